@@ -1,6 +1,10 @@
 import typer
 import os
+import sys
 import time
+import threading
+import numpy as np
+import multiprocessing
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -10,6 +14,7 @@ from typing import Optional
 # Import our custom modules
 from src import config
 from src.core.ocr import OCRProcessor
+from src.core.ocr_cache import OCRCache, file_digest
 from src.core.embedder import TextEmbedder
 from src.core.vector_db import VectorStore
 from src.utils.text_processor import chunk_text
@@ -17,6 +22,55 @@ from src.utils.text_processor import chunk_text
 app = typer.Typer(help="OCR Search Engine CLI")
 console = Console()
 
+# One OCRProcessor per worker process. With fork it is built once in the parent
+# and inherited; otherwise the Pool initializer builds one in each worker.
+_worker_ocr = None
+
+def _init_worker():
+    global _worker_ocr
+    if _worker_ocr is None:
+        _worker_ocr = OCRProcessor()
+
+def _pool_context():
+    """
+    fork on Linux: workers start as copies of the parent, so what it has already
+    loaded (Tesseract engine + language data) is shared copy-on-write instead of
+    re-imported and re-loaded per worker. Other platforms keep their default
+    (spawn on Windows; fork is unsafe on macOS).
+
+    Forking copies only the calling thread, so the pool must be created before
+    anything starts background threads (model thread pools, rich live displays):
+    a lock held by one of them at fork time would stay locked in every worker.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+def _start_ocr_pool(n_images: int):
+    """
+    Starts the OCR worker pool (see _pool_context). Call it while single-threaded.
+    Returns (pool, chunksize): about four chunks per worker, and never more workers
+    than there are chunks, so no forked process sits idle.
+    """
+    global _worker_ocr
+    cpus = os.cpu_count() or 1
+    chunksize = max(1, n_images // (cpus * 4))
+    processes = min(cpus, -(-n_images // chunksize))
+    pool_context = _pool_context()
+    if pool_context.get_start_method() == "fork" and _worker_ocr is None:
+        _worker_ocr = OCRProcessor() # loaded once here, inherited by every worker
+    return pool_context.Pool(processes=processes, initializer=_init_worker), chunksize
+
+def _ocr_worker(img_path: str):
+    """
+    Runs OCR on one image inside a Pool worker. Returns (path, text, error):
+    error is None on success, else a message (and text is "").
+    """
+    try:
+        return img_path, _worker_ocr.read_text(img_path), None
+    except Exception as e:
+        return img_path, "", str(e)
+
 @app.command()
 def index(
     force: bool = typer.Option(False, "--force", "-f", help="Force re-indexing of all files")
@@ -27,63 +81,149 @@ def index(
     console.print(Panel("[bold green]Starting Indexing Pipeline[/bold green]"))
 
     # 1. Check for images
-    image_files = [f for f in os.listdir(config.RAW_IMAGES_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff'))]
+    # scandir's DirEntry knows the file type without an extra stat() per entry
+    with os.scandir(config.RAW_IMAGES_DIR) as entries:
+        image_files = [e.name for e in entries if e.name.lower().endswith(config.IMAGE_EXTENSIONS) and e.is_file()]
     
     if not image_files:
         console.print("[bold red]Error:[/bold red] No images found in [yellow]data/raw[/yellow].")
         console.print("Please add some images and try again.")
         return
 
-    # 2. Initialize Components (Lazy loading)
-    with console.status("[bold green]Loading AI Models...[/bold green] (This happens once)", spinner="dots"):
-        ocr = OCRProcessor()
-        embedder = TextEmbedder(config.EMBEDDING_MODEL_NAME)
-        vector_db = VectorStore(config.INDEX_FILE, config.METADATA_FILE, config.VECTOR_DIMENSION)
+    # Pass 1: OCR + chunking. We need every chunk up front so the vectors can be
+    # written into one pre-allocated matrix and handed to FAISS in a single add.
+    chunks_per_file = []
 
-    # 3. Process Files
-    console.print(f"Found [bold]{len(image_files)}[/bold] images to process.")
-    
-    new_items_count = 0
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        transient=True,
-    ) as progress:
-        task = progress.add_task("[green]Processing...", total=len(image_files))
-
-        for img_file in image_files:
-            img_path = os.path.join(config.RAW_IMAGES_DIR, img_file)
-            progress.update(task, description=f"Reading [bold]{img_file}[/bold]...")
-            
-            # Step A: OCR
-            full_text = ocr.extract_text(img_path)
-            if not full_text:
-                continue
+    img_paths = [os.path.join(config.RAW_IMAGES_DIR, f) for f in image_files]
+    ocr_results = {}
 
-            # Step B: Chunking (The New Part)
-            # We use 500 chars per chunk with 100 char overlap
+    # Skip Tesseract for images we have already read (same bytes => same text).
+    # --force bypasses the lookup but still refreshes the cache.
+    ocr_cache = OCRCache(config.OCR_CACHE_FILE)
+    digests = {}
+    failed_paths = []
+    for img_path in img_paths:
+        try:
+            digests[img_path] = file_digest(img_path)
+        except OSError as e:
+            # Unreadable (permissions, deleted mid-run): skip it rather than abort the run
+            failed_paths.append(img_path)
+            console.print(f"[red]Could not read {os.path.basename(img_path)}:[/red] {e}")
+    if not force:
+        for img_path, digest in digests.items():
+            cached_text = ocr_cache.get(digest)
+            if cached_text is not None:
+                ocr_results[img_path] = cached_text
+    pending_paths = [p for p in digests if p not in ocr_results]
+
+    # Step A: OCR, fanned out across all cores (Tesseract is CPU-bound per image).
+    # The pool starts FIRST, while this process is still single-threaded: before the
+    # models below spin up their thread pools and before rich's refresh threads.
+    # The workers then read images while the models load.
+    pool, chunksize = _start_ocr_pool(len(pending_paths)) if pending_paths else (None, 1)
+    try:
+        if pool is not None:
+            ocr_stream = pool.imap_unordered(_ocr_worker, pending_paths, chunksize=chunksize)
+
+        # 2. Initialize Components (Lazy loading)
+        with console.status("[bold green]Loading AI Models...[/bold green] (This happens once)", spinner="dots"):
+            embedder = TextEmbedder(config.EMBEDDING_MODEL_NAME, config.ONNX_MODEL_DIR)
+            vector_db = VectorStore(config.INDEX_FILE, config.METADATA_FILE, config.VECTOR_DIMENSION, config.INDEX_TYPE)
+            # Chunks embedded on earlier runs are reused unless --force asks for a clean slate
+            if not force:
+                embedder.load_cache(config.EMBEDDING_CACHE_FILE)
+
+        # 3. Process Files
+        console.print(f"Found [bold]{len(image_files)}[/bold] images to process.")
+        if ocr_results:
+            console.print(f"Reusing cached OCR for [bold]{len(ocr_results)}[/bold] unchanged images.")
+
+        if pool is not None:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                transient=True,
+            ) as progress:
+                task = progress.add_task("[green]Running OCR...", total=len(pending_paths))
+
+                for img_path, full_text, error in ocr_stream:
+                    ocr_results[img_path] = full_text
+                    if error is None:
+                        ocr_cache.put(digests[img_path], full_text)
+                    else:
+                        # Not cached: a failure (e.g. Tesseract missing) must be retried next run
+                        failed_paths.append(img_path)
+                        console.print(f"[red]OCR failed for {os.path.basename(img_path)}:[/red] {error}")
+                    progress.update(task, description=f"Read [bold]{os.path.basename(img_path)}[/bold]")
+                    progress.advance(task)
+    finally:
+        if pool is not None:
+            pool.terminate() # what `with Pool(...)` does on exit
+
+    if pending_paths:
+        ocr_cache.save()
+    if failed_paths:
+        console.print(f"[yellow]Skipped {len(failed_paths)} unreadable images; they will be retried on the next run.[/yellow]")
+
+    # Step B: Chunking (The New Part), back in the original file order
+    # We use 500 chars per chunk with 100 char overlap
+    for img_file, img_path in zip(image_files, img_paths):
+        full_text = ocr_results.get(img_path)
+        if full_text:
             text_chunks = chunk_text(full_text, chunk_size=500, overlap=100)
+            if text_chunks:
+                chunks_per_file.append((img_file, text_chunks))
+
+    # Pass 2: Embed ALL chunks of each image in one batch, straight into the matrix
+    total_chunks = sum(len(text_chunks) for _, text_chunks in chunks_per_file)
+    vectors = np.empty((total_chunks, config.VECTOR_DIMENSION), dtype=np.float32)
+    metas = []
+
+    with console.status("[bold green]Embedding chunks...[/bold green]", spinner="dots"):
+        for img_file, text_chunks in chunks_per_file:
+            file_vectors = embedder.embed_texts(text_chunks)
+            if file_vectors is None:
+                continue
+
+            row = len(metas)
+            vectors[row:row + len(text_chunks)] = file_vectors
+
+            # We store the same filename, but different text segments
+            metas.extend(
+                {
+                    "filename": img_file,
+                    "text": chunk,
+                    "chunk_id": i,
+                    "total_chunks": len(text_chunks)
+                }
+                for i, chunk in enumerate(text_chunks)
+            )
+
+    # Step C: One bulk add for the whole run (rows of failed embeddings are dropped).
+    # The embedder already returns unit-norm rows, so skip VectorStore's normalize pass.
+    if metas:
+        vector_db.add_items_prenormalized(vectors[:len(metas)], metas)
+    new_items_count = len(metas)
+
+    # 4. Save. The index is written on a thread while this one writes the embedding
+    # cache (both spend most of their time in I/O outside the GIL). Both finish, and
+    # a failed write is reported, before we claim success.
+    save_errors = []
+
+    def save_index():
+        try:
+            vector_db.save_index()
+        except Exception as e:
+            save_errors.append(e)
+
+    save_thread = threading.Thread(target=save_index, name="save-index")
+    save_thread.start()
+    embedder.save_cache(config.EMBEDDING_CACHE_FILE)
+    save_thread.join()
 
-            # Step C: Embed & Store EACH chunk
-            for i, chunk in enumerate(text_chunks):
-                vector = embedder.embed_text(chunk)
-                
-                if vector is not None:
-                    # We store the same filename, but different text segments
-                    meta = {
-                        "filename": img_file, 
-                        "text": chunk, 
-                        "chunk_id": i,
-                        "total_chunks": len(text_chunks)
-                    }
-                    vector_db.add_item(vector, meta)
-                    new_items_count += 1
-            
-            progress.advance(task)
-
-    # 4. Save
-    vector_db.save_index()
+    if save_errors:
+        console.print(f"[bold red]Error:[/bold red] Could not save the index: {save_errors[0]}")
+        raise typer.Exit(code=1)
     
     console.print(Panel(f"[bold green]Indexing Complete![/bold green]\n\nIndexed Documents: {new_items_count}\nDatabase stored at: {config.INDEX_DIR}"))
 
@@ -99,9 +239,10 @@ def search(
         console.print("[red]Index not found. Run 'python main.py index' first.[/red]")
         return
 
-    # 1. Init
-    embedder = TextEmbedder(config.EMBEDDING_MODEL_NAME)
-    vector_db = VectorStore(config.INDEX_FILE, config.METADATA_FILE, config.VECTOR_DIMENSION)
+    # 1. Init (no warmup: the query is the only text we embed, so it would just add a pass)
+    embedder = TextEmbedder(config.EMBEDDING_MODEL_NAME, config.ONNX_MODEL_DIR, warmup=False)
+    # Search never writes, so map the stored vectors instead of reading them into memory
+    vector_db = VectorStore(config.INDEX_FILE, config.METADATA_FILE, config.VECTOR_DIMENSION, config.INDEX_TYPE, mmap=True)
 
     # 2. Embed
     query_vector = embedder.embed_text(query)
@@ -116,7 +257,7 @@ def search(
 
     for res in raw_results:
         filename = res['filename']
-        score = res['score'] # Remember: Lower is better for L2 Distance
+        score = res['score'] # Cosine similarity: Higher is better
         
         # If we haven't seen this file yet, add it.
         # OR if we found a better chunk for an existing file, update the score/preview.
@@ -162,11 +303,9 @@ def search(
 @app.command()
 def info():
     """Check the status of the Vector Database."""
-    if os.path.exists(config.METADATA_FILE):
-        import json
-        with open(config.METADATA_FILE, 'r') as f:
-            data = json.load(f)
-        console.print(f"[bold]Total Documents Indexed:[/bold] {len(data)}")
+    if os.path.exists(config.INDEX_FILE) and os.path.exists(config.METADATA_FILE):
+        # Just the count from the index file header; nothing needs to be loaded
+        console.print(f"[bold]Total Documents Indexed:[/bold] {VectorStore.peek_ntotal(config.INDEX_FILE)}")
         console.print(f"[bold]Index Location:[/bold] {config.INDEX_DIR}")
     else:
         console.print("[yellow]No index found.[/yellow]")
@@ -13,8 +13,16 @@ os.makedirs(RAW_IMAGES_DIR, exist_ok=True)
 os.makedirs(INDEX_DIR, exist_ok=True)
 os.makedirs(MANUAL_TESTS_DIR, exist_ok=True)
 
+# Files picked up from RAW_IMAGES_DIR (matched case-insensitively)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff')
+
 # Vector DB Settings
 INDEX_FILE = os.path.join(INDEX_DIR, "faiss_index.bin")
-METADATA_FILE = os.path.join(INDEX_DIR, "metadata.json")
+METADATA_FILE = os.path.join(INDEX_DIR, "metadata.sqlite")
+OCR_CACHE_FILE = os.path.join(INDEX_DIR, "ocr_cache.json") # image content hash -> OCR text
+EMBEDDING_CACHE_FILE = os.path.join(INDEX_DIR, "embedding_cache.npz") # chunk text hash -> vector
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2" # Fast and effective
-VECTOR_DIMENSION = 384 # Dimension for MiniLM-L6-v2
\ No newline at end of file
+VECTOR_DIMENSION = 384 # Dimension for MiniLM-L6-v2
+# Optional ONNX export of the model (see README). Used instead of PyTorch when present.
+ONNX_MODEL_DIR = os.path.join(DATA_DIR, "models", f"{EMBEDDING_MODEL_NAME}-onnx")
+INDEX_TYPE = "auto" # "flat", "hnsw", "sq8", "hnsw_sq8" or "auto" (flat, then HNSW over 8-bit codes from 10k chunks)
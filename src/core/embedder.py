@@ -1,23 +1,213 @@
 from sentence_transformers import SentenceTransformer
+import hashlib
 import logging
+import os
+import numpy as np
+import torch
+from typing import Dict, List, Optional, Set
+
+# Optional: ONNX Runtime backend for a pre-exported model (see README).
+# Without it we run the regular SentenceTransformer (PyTorch) model.
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+except ImportError:
+    ort = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Embedder")
 
+_KEY_BYTES = 16
+
+def _text_key(text: str) -> bytes:
+    """Stable 128-bit digest of a text (unlike hash(), the same across runs)."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=_KEY_BYTES).digest()
+
 class TextEmbedder:
-    def __init__(self, model_name: str):
-        logger.info(f"Loading Embedding Model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
-        logger.info("Model loaded.")
+    # all-MiniLM-L6-v2 was trained on up to 256 tokens; longer input is truncated
+    MAX_SEQ_LENGTH = 256
+    # Preferred first: the int8 model written by `optimum-cli onnxruntime quantize`
+    ONNX_FILENAMES = ("model_quantized.onnx", "model.onnx")
+
+    def __init__(self, model_name: str, onnx_dir: Optional[str] = None, warmup: bool = True):
+        self.model = None
+        self.session = None
+
+        # Memo of text digest -> embedding, so repeated chunks (headers, boilerplate,
+        # recurring templates) skip the transformer. See embed_texts / save_cache.
+        self._cache: Dict[bytes, np.ndarray] = {}
+        # Keys embed_texts() was asked for; save_cache() keeps only these
+        self._used_keys: Set[bytes] = set()
+        self.cache_tag = model_name
+
+        onnx_path = self._find_onnx_model(onnx_dir)
+        if onnx_path and ort is not None:
+            self._load_onnx(onnx_path, onnx_dir)
+            # An exported/quantized model gives (slightly) different vectors
+            self.cache_tag = f"{model_name}:{os.path.basename(onnx_path)}"
+        else:
+            if onnx_path:
+                logger.warning(f"Found {onnx_path} but onnxruntime/transformers are not installed; using PyTorch.")
+
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            if device == "cuda":
+                # Let cuDNN benchmark and pick the fastest kernels for the shapes it sees
+                torch.backends.cudnn.benchmark = True
+            logger.info(f"Loading Embedding Model: {model_name} on {device}...")
+            self.model = SentenceTransformer(model_name, device=device)
+            logger.info("Model loaded.")
+
+        if warmup:
+            self._warmup()
+
+    def _warmup(self):
+        """
+        Runs one throwaway encode (bypassing the cache) so lazy setup such as
+        kernel selection and memory pools is not billed to the first real batch.
+        """
+        try:
+            self._encode(["warmup"], batch_size=1)
+        except Exception as e:
+            logger.warning(f"Embedder warmup failed: {e}")
+
+    def _find_onnx_model(self, onnx_dir: Optional[str]) -> Optional[str]:
+        if not onnx_dir or not os.path.isdir(onnx_dir):
+            return None
+        for filename in self.ONNX_FILENAMES:
+            path = os.path.join(onnx_dir, filename)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load_onnx(self, onnx_path: str, tokenizer_dir: str):
+        logger.info(f"Loading ONNX Embedding Model: {onnx_path}...")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = os.cpu_count() or 1
+        # CUDA first when this onnxruntime build has it, CPU otherwise
+        providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in ort.get_available_providers()]
+        self.session = ort.InferenceSession(onnx_path, options, providers=providers)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+        logger.info(f"Model loaded ({self.session.get_providers()[0]}).")
+
+    def _encode_onnx(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Tokenize -> ONNX forward -> masked mean pooling -> L2 normalize (what SentenceTransformer does)."""
+        # Longest first, so each batch pads to similar lengths (SBERT's smart batching)
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        pooled = [None] * len(texts)
+
+        for start in range(0, len(texts), batch_size):
+            batch_ids = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch_ids],
+                padding=True,
+                truncation=True,
+                max_length=self.MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            token_embeddings = self.session.run(None, feed)[0] # (batch, tokens, dim)
+
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            means = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            for row, i in enumerate(batch_ids):
+                pooled[i] = means[row]
+
+        embeddings = np.asarray(pooled, dtype=np.float32)
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+    @property
+    def dimension(self) -> int:
+        """Length of the vectors this model produces."""
+        if self.session is not None:
+            return int(self.session.get_outputs()[0].shape[-1])
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        if self.session is not None:
+            return self._encode_onnx(texts, batch_size)
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
 
     def embed_text(self, text: str):
         """
         Converts a string of text into a vector embedding.
+        The vector is unit-norm, so an inner product with it is cosine similarity.
         """
         try:
             # Generate embedding
-            embedding = self.model.encode(text, normalize_embeddings=True)
+            embedding = self._encode([text], batch_size=1)[0]
             return embedding
         except Exception as e:
             logger.error(f"Embedding failed: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def embed_texts(self, texts: List[str], batch_size: int = 64):
+        """
+        Converts a list of strings into an (N, dim) float32 array in one call.
+
+        Inputs are sorted by length internally ("smart batching") so each batch is
+        padded only to its own longest text. Rows are returned in the same order
+        as `texts` and are unit-norm (normalized inside the encode call), so they can
+        go straight to VectorStore.add_items_prenormalized().
+
+        Texts seen before (in this call, earlier calls, or a loaded cache) are not
+        re-encoded: only the distinct new ones go through the model.
+        """
+        try:
+            keys = [_text_key(t) for t in texts]
+            self._used_keys.update(keys)
+
+            # Distinct texts we have no vector for yet, in first-seen order
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._cache and key not in missing:
+                    missing[key] = text
+
+            if missing:
+                new_vectors = self._encode(list(missing.values()), batch_size).astype('float32', copy=False)
+                self._cache.update(zip(missing.keys(), new_vectors))
+
+            if not keys:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            return np.stack([self._cache[key] for key in keys])
+        except Exception as e:
+            logger.error(f"Batch embedding failed: {e}")
+            return None
+
+    def load_cache(self, cache_path: str):
+        """Loads embeddings saved by save_cache(), if they were made by this same model."""
+        if not os.path.exists(cache_path):
+            return
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                if str(data["tag"]) != self.cache_tag:
+                    logger.info(f"Ignoring embedding cache from another model ({data['tag']}).")
+                    return
+                self._cache.update(zip((row.tobytes() for row in data["keys"]), data["vectors"]))
+            logger.info(f"Loaded {len(self._cache)} cached embeddings.")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache {cache_path}: {e}")
+
+    def save_cache(self, cache_path: str):
+        """
+        Saves the embeddings of every text embed_texts() saw in this session, keyed
+        by text digest. Loaded entries nothing asked for again (chunks of deleted or
+        changed images) are dropped, so the file tracks the index instead of growing.
+        """
+        used = [key for key in self._cache if key in self._used_keys]
+        if not used:
+            return
+        # Raw uint8 rows, not an "S16" array: NumPy strips trailing NUL bytes from those
+        keys = np.frombuffer(b"".join(used), dtype=np.uint8).reshape(-1, _KEY_BYTES)
+        vectors = np.stack([self._cache[key] for key in used])
+        # Through a file handle: np.savez would otherwise append ".npz" to the name
+        with open(cache_path, "wb") as f:
+            np.savez(f, tag=np.array(self.cache_tag), keys=keys, vectors=vectors)
+        logger.info(f"Embedding cache saved to {cache_path}")
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+# Optional: orjson (C encoder/decoder working on bytes) when installed, stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("OCRCache")
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the file contents (read in 1MB blocks), as a hex string."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class OCRCache:
+    """
+    Persistent map of image content hash -> extracted OCR text.
+
+    Keyed by file CONTENT, not name, so renamed/moved images still hit and an
+    edited image with the same name is re-processed.
+    """
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.entries: Dict[str, str] = {}
+        self.load()
+
+    def get(self, digest: str) -> Optional[str]:
+        return self.entries.get(digest)
+
+    def put(self, digest: str, text: str):
+        self.entries[digest] = text
+
+    def load(self):
+        """Loads the cache from disk if it exists."""
+        if os.path.exists(self.cache_path):
+            try:
+                if orjson is not None:
+                    with open(self.cache_path, 'rb') as f:
+                        self.entries = orjson.loads(f.read())
+                else:
+                    with open(self.cache_path, 'r', encoding='utf-8') as f:
+                        self.entries = json.load(f)
+                logger.info(f"Loaded {len(self.entries)} cached OCR results.")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable OCR cache {self.cache_path}: {e}")
+                self.entries = {}
+
+    def save(self):
+        """Saves the cache to disk."""
+        if orjson is not None:
+            with open(self.cache_path, 'wb') as f:
+                f.write(orjson.dumps(self.entries))
+        else:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+        logger.info(f"OCR cache saved to {self.cache_path}")
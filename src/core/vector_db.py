@@ -1,81 +1,330 @@
 import faiss
 import numpy as np
-import json
+import sqlite3
 import os
+import struct
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("VectorDB")
 
+# IO_FLAG_MMAP_IFC maps the vector/code storage of IndexFlatCodes (flat, SQ8, and
+# the storage under HNSW) straight from the file. Plain IO_FLAG_MMAP only maps IVF
+# inverted lists, so it would still read everything here. Older FAISS builds
+# (e.g. faiss-cpu 1.7.4) lack the flag; mmap=True then loads normally.
+MMAP_READ_FLAGS = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if hasattr(faiss, "IO_FLAG_MMAP_IFC") else None
+
 class VectorStore:
-    def __init__(self, index_path: str, metadata_path: str, dimension: int):
+    # index_type values:
+    #   "flat"     - exact IndexFlatIP scan, O(N) per query
+    #   "hnsw"     - IndexHNSWFlat graph, approximate but sub-linear per query
+    #   "sq8"      - IndexScalarQuantizer (8-bit codes, 4x less memory than float32)
+    #   "hnsw_sq8" - IndexHNSWSQ, HNSW graph over 8-bit codes
+    #   "auto"     - flat while small, rebuilt as "hnsw_sq8" once ntotal reaches HNSW_THRESHOLD
+    # The 8-bit kinds must be trained, so they also start flat and are rebuilt
+    # (trained on everything stored so far) once there are SQ_MIN_TRAIN vectors.
+    INDEX_TYPES = ("flat", "hnsw", "sq8", "hnsw_sq8", "auto")
+    HNSW_THRESHOLD = 10_000
+    SQ_MIN_TRAIN = 1_000
+    HNSW_M = 32                  # graph neighbours per node
+    HNSW_EF_CONSTRUCTION = 200   # build-time beam width (higher = better graph, slower build)
+    HNSW_EF_SEARCH_MIN = 64      # query-time beam width floor
+    METADATA_MMAP_SIZE = 256 * 1024 * 1024  # bytes of the SQLite file mapped into memory
+    PREVIEW_CHARS = 200
+    # Index files whose fourcc is directly followed by FAISS's common header
+    # (int32 d, int64 ntotal): IndexFlatIP/L2, IndexHNSWFlat/SQ, IndexScalarQuantizer
+    HEADER_FOURCCS = (b"IxFI", b"IxF2", b"IHNf", b"IHNs", b"IxSQ")
+
+    def __init__(self, index_path: str, metadata_path: str, dimension: int, index_type: str = "auto",
+                 ef_construction: int = HNSW_EF_CONSTRUCTION, mmap: bool = False):
+        self._check_index_type(index_type)
+
         self.index_path = index_path
         self.metadata_path = metadata_path
         self.dimension = dimension
+        self.index_type = index_type
+        # Only used when an HNSW graph is built; lower builds faster but a weaker graph
+        self.ef_construction = ef_construction
+        # mmap=True maps the stored vectors of an existing index file instead of
+        # reading them into memory (see MMAP_READ_FLAGS; HNSW graph links are still
+        # read). A mapped store is READ-ONLY: adding or saving raises RuntimeError.
+        self.mmap = mmap
+        self.read_only = False
         
         self.index = None
-        self.metadata = [] # List of dicts: [{"id": 0, "filename": "doc1.png", "text": "..."}]
+        # SQLite table keyed by FAISS id; rows are fetched only for search hits
+        self.db = None
 
         self.load_index()
 
+    def _check_index_type(self, index_type: str):
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unknown index_type '{index_type}'. Expected one of {self.INDEX_TYPES}.")
+
+    def _connect_metadata(self):
+        """Opens the SQLite metadata store, creating the table if needed."""
+        if self.db is None:
+            # save_index() may run on a background thread (see main.py), so the
+            # connection must not be pinned to the thread that opened it.
+            # isolation_level=None: we issue BEGIN/COMMIT ourselves (see _begin).
+            self.db = sqlite3.connect(self.metadata_path, check_same_thread=False, isolation_level=None)
+            # WAL: readers (search) never block on a pending write. mmap: pages are
+            # read straight from the OS page cache instead of copied into SQLite's.
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(f"PRAGMA mmap_size={self.METADATA_MMAP_SIZE}")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "id INTEGER PRIMARY KEY, filename TEXT, text TEXT, chunk_id INTEGER, total_chunks INTEGER)"
+            )
+
+    def _begin(self):
+        """Opens a write transaction unless one is already pending."""
+        # It stays open until save_index() commits it together with the FAISS
+        # file, so the two stay in sync on disk.
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN")
+
+    def _insert_metadata(self, metas: List[Dict]):
+        self._begin()
+        self.db.executemany(
+            "INSERT INTO metadata (id, filename, text, chunk_id, total_chunks) VALUES (?, ?, ?, ?, ?)",
+            [(m["id"], m["filename"], m["text"], m.get("chunk_id"), m.get("total_chunks")) for m in metas],
+        )
+
+    @staticmethod
+    def peek_ntotal(index_path: str) -> int:
+        """
+        Number of vectors in a saved index file, read from its 16-byte header
+        (no index is built). Unknown index layouts fall back to a full read_index,
+        with the flat code storage memory-mapped when this FAISS build can.
+        """
+        with open(index_path, 'rb') as f:
+            header = f.read(16)
+        if len(header) == 16 and header[:4] in VectorStore.HEADER_FOURCCS:
+            _, ntotal = struct.unpack('<iq', header[4:])
+            return ntotal
+        if MMAP_READ_FLAGS is not None:
+            return faiss.read_index(index_path, MMAP_READ_FLAGS).ntotal
+        return faiss.read_index(index_path).ntotal
+
+    def _build_index(self, kind: str):
+        """Creates an empty FAISS index of the given kind (any INDEX_TYPES value except "auto")."""
+        # Every stored vector is L2-normalized, so the inner-product score is
+        # cosine similarity (HIGHER is better) for every kind.
+        if kind == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dimension, self.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        elif kind == "hnsw_sq8":
+            index = faiss.IndexHNSWSQ(self.dimension, faiss.ScalarQuantizer.QT_8bit, self.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        elif kind == "sq8":
+            # Queries stay float32; FAISS decodes the 8-bit codes on the fly
+            return faiss.IndexScalarQuantizer(self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        else:
+            return faiss.IndexFlatIP(self.dimension)
+        index.hnsw.efConstruction = self.ef_construction
+        return index
+
+    def _upgrade_plan(self):
+        """Returns (kind, min_vectors) this store is rebuilt as once it grows, or None to stay as is."""
+        if self.index_type == "auto":
+            return "hnsw_sq8", self.HNSW_THRESHOLD
+        if self.index_type in ("sq8", "hnsw_sq8"):
+            return self.index_type, self.SQ_MIN_TRAIN
+        return None
+
     def create_index(self):
         """Initializes a new FAISS index."""
-        # IndexFlatL2 is standard Euclidean distance search (good for general use)
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.metadata = []
-        logger.info("Created new FAISS index.")
+        # Everything but "hnsw" starts flat: exact, needs no training, and is
+        # cheapest while the corpus is small (see _maybe_upgrade_index)
+        self.index = self._build_index("hnsw" if self.index_type == "hnsw" else "flat")
+        # A fresh index means fresh ids, so any old rows are stale
+        self._connect_metadata()
+        self._begin()
+        self.db.execute("DELETE FROM metadata")
+        logger.info(f"Created new FAISS index ({type(self.index).__name__}).")
+
+    def reset(self, index_type: Optional[str] = None):
+        """
+        Empties the store (a new index, every metadata row deleted), optionally as
+        another index_type. Like adds, this reaches disk with the next save_index().
+        """
+        self._check_writable()
+        if index_type is not None:
+            self._check_index_type(index_type)
+            self.index_type = index_type
+        self.create_index()
+
+    def _maybe_upgrade_index(self):
+        """Rebuilds a flat index as its target kind once it holds enough vectors (see _upgrade_plan)."""
+        plan = self._upgrade_plan()
+        if plan is None or not isinstance(self.index, faiss.IndexFlat):
+            return
+        kind, min_vectors = plan
+        if self.index.ntotal < min_vectors:
+            return
+
+        logger.info(f"Index has {self.index.ntotal} vectors, rebuilding as {kind}...")
+        # Re-adding in the original order keeps FAISS ids == metadata ids
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        index = self._build_index(kind)
+        if not index.is_trained:
+            # Scalar quantizers learn each dimension's value range from the data
+            index.train(vectors)
+        index.add(vectors)
+        self.index = index
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("This VectorStore was loaded with mmap=True and is read-only.")
+
+    def reserve(self, n: int):
+        """
+        Pre-allocates room for `n` more vectors, so a run of add_item() calls
+        appends into one buffer instead of repeatedly growing (and copying) it.
+        Covers the code buffer of every INDEX_TYPES kind (for HNSW, its storage index),
+        not the graph itself.
+        """
+        self._check_writable()
+        if self.index is None:
+            self.create_index()
+        storage = faiss.downcast_index(self.index.storage if hasattr(self.index, "hnsw") else self.index)
+        if not isinstance(storage, faiss.IndexFlatCodes):
+            return
+        # The SWIG vector has no reserve(): growing then shrinking it keeps the
+        # larger capacity (std::vector never shrinks its buffer on resize)
+        used = storage.codes.size()
+        storage.codes.resize(used + n * storage.code_size)
+        storage.codes.resize(used)
 
     def add_item(self, vector: np.array, meta: Dict):
         """Adds a single vector and its metadata."""
+        self._check_writable()
         if self.index is None:
             self.create_index()
 
-        # FAISS expects float32
-        vector = np.array([vector]).astype('float32')
+        # FAISS expects a float32 (1, dim) row. One copy (normalize_L2 works in
+        # place and must not touch the caller's array), then a free reshape view.
+        vector = np.array(vector, dtype='float32').reshape(1, -1)
+        faiss.normalize_L2(vector)
         self.index.add(vector)
         
         # Sync metadata ID with FAISS ID (which is sequential 0, 1, 2...)
-        meta["id"] = self.index.ntotal - 1 
-        self.metadata.append(meta)
+        meta["id"] = self.index.ntotal - 1
+        self._insert_metadata([meta])
+        self._maybe_upgrade_index()
+
+    def add_items(self, vectors: np.ndarray, metas: List[Dict]):
+        """Adds a batch of vectors (one row per item) and their metadata in a single call."""
+        # Copy so normalizing in place never touches the caller's array
+        vectors = np.array(vectors, dtype='float32')
+        if vectors.ndim == 2:
+            faiss.normalize_L2(vectors)
+        self.add_items_prenormalized(vectors, metas)
+
+    def add_items_prenormalized(self, vectors: np.ndarray, metas: List[Dict]):
+        """
+        Like add_items(), but trusts that every row is already unit-norm (e.g. the
+        output of TextEmbedder) and skips the normalization pass. Float32 C-contiguous
+        input is handed to FAISS without a copy.
+        """
+        self._check_writable()
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of shape (N, {self.dimension}), got {vectors.shape}.")
+        if len(vectors) != len(metas):
+            raise ValueError(f"Got {len(vectors)} vectors but {len(metas)} metadata entries.")
+        if self.index is None:
+            self.create_index()
+
+        start_id = self.index.ntotal
+        self.index.add(vectors)
+
+        # FAISS assigned the new rows ids start_id .. start_id + n - 1
+        for meta, item_id in zip(metas, range(start_id, start_id + len(metas))):
+            meta["id"] = item_id
+        self._insert_metadata(metas)
+        self._maybe_upgrade_index()
 
     def search(self, query_vector: np.array, top_k: int = 5) -> List[Dict]:
         """Searches the index for similar vectors."""
+        # The query is not re-normalized: its norm scales every score equally, so the
+        # ranking is unchanged (and TextEmbedder already returns unit-norm vectors).
+        # No copy when it is already float32 + contiguous (as the embedder returns it)
+        query_vector = np.ascontiguousarray(query_vector, dtype='float32')
+        if query_vector.ndim == 1:
+            query_vector = query_vector.reshape(1, -1)
+        return self.search_many(query_vector[:1], top_k)[0]
+
+    def search_many(self, query_vectors: np.ndarray, top_k: int = 5) -> List[List[Dict]]:
+        """
+        Searches for several queries (one row each) in a single FAISS call.
+        Returns one result list per query, each shaped like search()'s.
+        """
+        query_vectors = np.ascontiguousarray(query_vectors, dtype='float32')
+        if query_vectors.ndim != 2 or query_vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected query vectors of shape (N, {self.dimension}), got {query_vectors.shape}.")
+
         if self.index is None or self.index.ntotal == 0:
             logger.warning("Index is empty.")
-            return []
+            return [[] for _ in range(len(query_vectors))]
 
-        query_vector = np.array([query_vector]).astype('float32')
-        
-        # distances, indices
-        D, I = self.index.search(query_vector, top_k)
-        
-        results = []
-        for i, idx in enumerate(I[0]):
-            if idx != -1 and idx < len(self.metadata):
-                item = self.metadata[idx]
-                results.append({
-                    "filename": item["filename"],
-                    "preview": item["text"][:200] + "...", # Show snippet
-                    "score": float(D[0][i]) # Distance score (lower is better for L2)
-                })
-        
-        return results
+        if hasattr(self.index, "hnsw"):
+            # Beam width must cover top_k; wider beams trade speed for recall
+            self.index.hnsw.efSearch = max(top_k * 4, self.HNSW_EF_SEARCH_MIN)
+
+        # distances, indices: (nq, top_k) each. One call => one thread-pool dispatch
+        # and one matrix product against the stored vectors for all queries.
+        D, I = self.index.search(query_vectors, top_k)
+
+        # Fetch metadata for the hits only (of all queries at once), and only the
+        # preview part of their text
+        hit_ids = sorted({int(idx) for idx in I.ravel() if idx != -1})
+        items = {}
+        if hit_ids:
+            placeholders = ",".join("?" * len(hit_ids))
+            rows = self.db.execute(
+                f"SELECT id, filename, substr(text, 1, {self.PREVIEW_CHARS}) FROM metadata WHERE id IN ({placeholders})",
+                hit_ids,
+            ).fetchall()
+            items = {row[0]: row for row in rows}
+
+        all_results = []
+        for scores, ids in zip(D, I):
+            results = []
+            for score, idx in zip(scores, ids):
+                if idx in items:
+                    _, filename, preview = items[idx]
+                    results.append({
+                        "filename": filename,
+                        "preview": preview + "...", # Show snippet
+                        "score": float(score) # Cosine similarity (higher is better)
+                    })
+            all_results.append(results)
+
+        return all_results
 
     def save_index(self):
-        """Saves the FAISS index and metadata to disk."""
+        """Saves the FAISS index to disk and commits the pending metadata rows."""
+        # Writing over the file a read-only store is mapped from would corrupt it
+        self._check_writable()
         if self.index:
             faiss.write_index(self.index, self.index_path)
-            with open(self.metadata_path, 'w') as f:
-                json.dump(self.metadata, f)
+            if self.db.in_transaction:
+                self.db.execute("COMMIT")
             logger.info(f"Index saved to {self.index_path}")
 
     def load_index(self):
         """Loads index from disk if it exists."""
         if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
-            self.index = faiss.read_index(self.index_path)
-            with open(self.metadata_path, 'r') as f:
-                self.metadata = json.load(f)
+            if self.mmap and MMAP_READ_FLAGS is not None:
+                self.index = faiss.read_index(self.index_path, MMAP_READ_FLAGS)
+                self.read_only = True
+            else:
+                if self.mmap:
+                    # Only slower to open, so not worth a warning on every search
+                    logger.info("This FAISS build cannot memory-map indexes; loading it into memory.")
+                self.index = faiss.read_index(self.index_path)
+            self._connect_metadata()
             logger.info("Existing index loaded.")
         else:
-            self.create_index()
\ No newline at end of file
+            self.create_index()
@@ -1,7 +1,60 @@
 import logging
+import numpy as np
 
 logger = logging.getLogger("TextProcessor")
 
+# Texts at least this long use the numba-compiled _chunk_offsets (if installed).
+# Below it the plain loop finishes before the JIT compile would.
+NUMBA_MIN_CHARS = 100_000
+
+def _chunk_offsets(spaces, text_len, chunk_size, overlap):
+    """
+    Returns (starts, ends) int64 arrays of each chunk's character range.
+    `spaces` holds the sorted positions of every space in the text.
+    """
+    starts = []
+    ends = []
+    start = 0
+
+    while start < text_len:
+        end = start + chunk_size
+
+        # Adjust 'end' to not cut a word in half
+        if end < text_len:
+            # The last space before 'end' (same as text.rfind(' ', start, end))
+            idx = np.searchsorted(spaces, end) - 1
+            if idx >= 0 and spaces[idx] > start:
+                end = spaces[idx]
+
+        starts.append(start)
+        ends.append(end)
+
+        # Move the start forward, minus the overlap.
+        # If that would not move us forward (huge words / overlap >= chunk), skip the overlap
+        # so the loop always terminates.
+        next_start = end - overlap
+        if next_start <= start or next_start >= end:
+            next_start = end
+        start = next_start
+
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+# Optional: numba compiles the same loop to native code. Importing numba alone
+# costs ~0.3 s, so it only happens on the first big text (the compiled code is
+# then cached on disk). None = not tried yet, False = numba is not installed.
+_chunk_offsets_jit = None
+
+def _get_chunk_offsets_jit():
+    """Returns the numba-compiled _chunk_offsets, or None without numba."""
+    global _chunk_offsets_jit
+    if _chunk_offsets_jit is None:
+        try:
+            from numba import njit
+            _chunk_offsets_jit = njit(cache=True)(_chunk_offsets)
+        except ImportError:
+            _chunk_offsets_jit = False
+    return _chunk_offsets_jit or None
+
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100):
     """
     Splits text into overlapping chunks.
@@ -14,31 +67,31 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100):
     if not text:
         return []
 
-    chunks = []
-    start = 0
     text_len = len(text)
 
-    while start < text_len:
-        end = start + chunk_size
-        
-        # Adjust 'end' to not cut a word in half
-        if end < text_len:
-            # Look for the last space within the chunk to break safely
-            last_space = text.rfind(' ', start, end)
-            if last_space != -1:
-                end = last_space
-        
-        # Extract the chunk
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        
-        # Move the start forward, minus the overlap
-        start = end - overlap
-        
-        # Breaking the loop if we aren't moving forward (prevents infinite loops on huge words)
-        if start >= end:
-            start = end
+    # Find every space ONCE, so each chunk's break point is a binary search
+    # instead of an rfind() re-scanning up to chunk_size characters.
+    # UTF-32 gives one fixed-width code per character, so these offsets are
+    # string indices even when the OCR text contains non-ASCII characters.
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    spaces = np.flatnonzero(codes == 0x20)
+
+    # Same slide-back rule as _chunk_offsets (see next_start)
+    step = chunk_size - overlap if 0 < overlap < chunk_size else chunk_size
+
+    if spaces.size == 0:
+        # No word boundaries to snap to, so every chunk starts a fixed step after
+        # the previous one: build all the offsets at once instead of stepping.
+        starts = np.arange(0, text_len, step).tolist()
+        chunks = [chunk for chunk in (text[s:s + chunk_size].strip() for s in starts) if chunk]
+        logger.info(f"Split text into {len(chunks)} chunks.")
+        return chunks
+
+    # Offsets first (compiled when numba is available and the text is big enough
+    # to pay back the one-time JIT), then one Python pass to slice them out
+    offsets = (_get_chunk_offsets_jit() if text_len >= NUMBA_MIN_CHARS else None) or _chunk_offsets
+    starts, ends = offsets(spaces, text_len, chunk_size, overlap)
+    chunks = [chunk for chunk in (text[s:e].strip() for s, e in zip(starts.tolist(), ends.tolist())) if chunk]
 
     logger.info(f"Split text into {len(chunks)} chunks.")
-    return chunks
\ No newline at end of file
+    return chunks
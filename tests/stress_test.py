@@ -1,43 +1,91 @@
+import importlib.util
 import os
 import shutil
 import unittest
+from pathlib import Path
+from unittest import mock
+import faiss
 import numpy as np
+from src.utils import text_processor
 from src.utils.text_processor import chunk_text
-from src.core.vector_db import VectorStore
+from src.core.vector_db import MMAP_READ_FLAGS, VectorStore
 import cv2 
 
 # Configuration for Test
 TEST_DIR = "data/stress_test"
 TEST_INDEX_DIR = "data/stress_test_index"
 TEST_INDEX_FILE = os.path.join(TEST_INDEX_DIR, "index.bin")
-TEST_METADATA_FILE = os.path.join(TEST_INDEX_DIR, "metadata.json")
+TEST_METADATA_FILE = os.path.join(TEST_INDEX_DIR, "metadata.sqlite")
+# The saved 1000-item HNSW graph the reload tests share (see _saved_hnsw)
+HNSW_INDEX_FILE = os.path.join(TEST_INDEX_DIR, "hnsw_index.bin")
+HNSW_METADATA_FILE = os.path.join(TEST_INDEX_DIR, "hnsw_metadata.sqlite")
+
+def _render_good_png() -> bytes:
+    img = np.zeros((100, 100, 3), dtype=np.uint8)
+    cv2.putText(img, "Hello World", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    return cv2.imencode('.png', img)[1].tobytes()
+
+# Rendered + PNG-encoded once at import, then just written out by setUpClass
+GOOD_PNG_BYTES = _render_good_png()
+
+# Dummy images written by setUpClass
+FIXTURES = [
+    ("good.png", GOOD_PNG_BYTES),           # 1. Good Image
+    ("corrupt.png", b""),                   # 2. Corrupt Image (0 bytes)
+    ("fake.png", b"This is not an image"),  # 3. Text file masked as image
+]
+
+def _mass_items():
+    """1000 random vectors + metadata. Fixed seed: the same data every run (PCG64, drawn straight as float32)."""
+    vecs = np.random.default_rng(0).random((1000, 384), dtype=np.float32)
+    metas = [{"filename": f"doc_{i}.png", "text": f"text {i}"} for i in range(1000)]
+    return vecs, metas
 
 class StressTest(unittest.TestCase):
     
     @classmethod
     def setUpClass(cls):
+        # 1000-vector indexes fit in cache: OpenMP fork/join costs more than the
+        # scans themselves, and parallel test runners would oversubscribe cores
+        cls._omp_threads = faiss.omp_get_max_threads()
+        faiss.omp_set_num_threads(1)
+
         # Clean up previous tests
-        if os.path.exists(TEST_DIR):
-            shutil.rmtree(TEST_DIR)
-        if os.path.exists(TEST_INDEX_DIR):
-            shutil.rmtree(TEST_INDEX_DIR)
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
+        shutil.rmtree(TEST_INDEX_DIR, ignore_errors=True)
             
-        os.makedirs(TEST_DIR)
-        os.makedirs(TEST_INDEX_DIR)
-        
-        # Create Dummy Images
-        # 1. Good Image
-        img = np.zeros((100, 100, 3), dtype=np.uint8)
-        cv2.putText(img, "Hello World", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        cv2.imwrite(os.path.join(TEST_DIR, "good.png"), img)
+        Path(TEST_DIR).mkdir(parents=True, exist_ok=True)
+        Path(TEST_INDEX_DIR).mkdir(parents=True, exist_ok=True)
         
-        # 2. Corrupt Image (0 bytes)
-        with open(os.path.join(TEST_DIR, "corrupt.png"), "w") as f:
-            f.write("")
-            
-        # 3. Text file masked as image
-        with open(os.path.join(TEST_DIR, "fake.png"), "w") as f:
-            f.write("This is not an image")
+        # Create Dummy Images (see FIXTURES)
+        for name, payload in FIXTURES:
+            Path(TEST_DIR, name).write_bytes(payload)
+
+        # One store for every test; each test starts with cls.db.reset(<kind>).
+        # A small HNSW build beam keeps the 1000-item graphs fast to build.
+        cls.db = VectorStore(TEST_INDEX_FILE, TEST_METADATA_FILE, 384, index_type="flat", ef_construction=40)
+        cls._hnsw_saved = False
+
+    @classmethod
+    def tearDownClass(cls):
+        faiss.omp_set_num_threads(cls._omp_threads)
+
+    @classmethod
+    def _saved_hnsw(cls):
+        """
+        Builds the _mass_items() HNSW graph and saves it to HNSW_INDEX_FILE, once
+        per run: the reload tests open the same file instead of each rebuilding it.
+        """
+        if not cls._hnsw_saved:
+            db = VectorStore(HNSW_INDEX_FILE, HNSW_METADATA_FILE, 384, index_type="hnsw", ef_construction=40)
+            db.add_items(*_mass_items())
+            db.save_index()
+            cls._hnsw_saved = True
+
+    def _assert_self_recall(self, db, vecs, metas):
+        """Every stored vector finds itself first."""
+        hits = db.search_many(vecs, top_k=1)
+        self.assertEqual([h[0]['filename'] for h in hits], [m["filename"] for m in metas])
 
     def test_chunking_logic(self):
         print("\n[TEST] Chunking Logic")
@@ -47,22 +95,60 @@ class StressTest(unittest.TestCase):
         self.assertEqual(len(chunks), 3)
         print("✅ Chunking works correctly.")
 
+    def test_chunking_word_breaks(self):
+        print("\n[TEST] Chunking Word Breaks (non-ASCII)")
+        # Non-ASCII characters would shift UTF-8 byte offsets, so break points must be
+        # character indices. Spaces at 5, 11, 14 (20 chars in total).
+        text = "héllo wörld 東京 tower"
+        chunks = chunk_text(text, chunk_size=10, overlap=3)
+        # [0,10) -> cut at the space at 5; [2,12) -> 11; [8,18) -> 14; [11,20) is the tail
+        self.assertEqual(chunks, ["héllo", "llo wörld", "rld 東京", "東京 tower", "er"])
+        print("✅ Chunks break at spaces, counted in characters.")
+
+    def test_chunking_space_at_chunk_start(self):
+        print("\n[TEST] Chunking With a Space at the Chunk Start")
+        # The 2nd and 3rd chunks start ON a space (4, 9): that space must not count as
+        # the break point, or the chunk would be empty and stop advancing.
+        chunks = chunk_text("abcd efgh ijkl", chunk_size=5, overlap=0)
+        self.assertEqual(chunks, ["abcd", "efgh", "ijkl"])
+        print("✅ A space at the chunk start is not used as its break.")
+
+    @unittest.skipIf(importlib.util.find_spec("numba") is None, "numba is not installed")
+    def test_chunking_numba_matches_python(self):
+        print("\n[TEST] Chunking (numba offsets)")
+        words = ["héllo", "wörld", "東京", "tower", "a", "supercalifragilistic"]
+        rng = np.random.default_rng(0)
+        text = " ".join(words[i] for i in rng.integers(0, len(words), 2000))
+        expected = chunk_text(text, chunk_size=50, overlap=10)
+        # Force the compiled path for this (short) text
+        with mock.patch.object(text_processor, "NUMBA_MIN_CHARS", 0):
+            self.assertEqual(chunk_text(text, chunk_size=50, overlap=10), expected)
+            self.assertEqual(chunk_text("héllo wörld 東京 tower", chunk_size=10, overlap=3),
+                             ["héllo", "llo wörld", "rld 東京", "東京 tower", "er"])
+        self.assertIsNotNone(text_processor._chunk_offsets_jit)
+        print("✅ Compiled offsets match the Python loop.")
+
     def test_vector_db_sorting(self):
         print("\n[TEST] Vector DB Sorting (Cosine Similarity)")
-        db = VectorStore(TEST_INDEX_FILE, TEST_METADATA_FILE, 384)
+        # Exact search, so the ordering below is deterministic
+        db = self.db
+        db.reset(index_type="flat")
         
-        # Vector A (Target)
-        vec_a = np.ones(384, dtype='float32') 
-        # Vector B (Close to A)
-        vec_b = np.copy(vec_a)
-        # Vector C (Opposite/Far)
-        vec_c = np.zeros(384, dtype='float32') # Orthogonal
+        # One (2, 384) block: row 0 is Vector A (Target), row 1 is Vector C (Opposite/Far)
+        mat = np.empty((2, 384), dtype='float32')
+        mat[0] = 1
+        mat[1] = 0 # Orthogonal
         
-        db.add_item(vec_a, {"filename": "match.png", "text": "Match"})
-        db.add_item(vec_c, {"filename": "garbage.png", "text": "Garbage"})
+        # Normalize both rows in one pass, then add them without a second one.
+        # A zero row stays zero (normalize_L2 leaves it alone), so no NaN guard is needed.
+        faiss.normalize_L2(mat)
+        db.add_items_prenormalized(mat, [
+            {"filename": "match.png", "text": "Match"},
+            {"filename": "garbage.png", "text": "Garbage"},
+        ])
         
         # Search for A. Match should be first.
-        results = db.search(vec_a, top_k=2)
+        results = db.search(mat[0], top_k=2)
         
         self.assertEqual(results[0]['filename'], "match.png")
         # Score for identical vectors in Inner Product (normalized) should be ~1.0? 
@@ -73,19 +159,79 @@ class StressTest(unittest.TestCase):
 
     def test_mass_indexing_simulation(self):
         print("\n[TEST] Mass Indexing Simulation (1000 items)")
-        db = VectorStore(TEST_INDEX_FILE, TEST_METADATA_FILE, 384)
+        # HNSW graph (what large indexes use)
+        db = self.db
+        db.reset(index_type="hnsw")
         
-        # Add 1000 items
-        for i in range(1000):
-            vec = np.random.rand(384).astype('float32')
-            db.add_item(vec, {"filename": f"doc_{i}.png", "text": f"text {i}"})
-            
-        db.save_index()
+        # Add 1000 items in one bulk call (normalized + added to FAISS at once)
+        vecs, metas = _mass_items()
+        db.reserve(len(vecs)) # one allocation up front for the vector storage
+        db.add_items(vecs, metas)
+        self.assertEqual(db.index.ntotal, 1000) # Should be exactly 1000
+
+        # Recall through the graph
+        self._assert_self_recall(db, vecs, metas)
+        print("✅ Successfully indexed 1000 items.")
+
+    def test_save_and_reload(self):
+        print("\n[TEST] Save + Reload (1000 items)")
+        self._saved_hnsw()
         
+        # Should be exactly 1000, read straight from the file header
+        self.assertEqual(VectorStore.peek_ntotal(HNSW_INDEX_FILE), 1000)
+
+        # Reload
+        db2 = VectorStore(HNSW_INDEX_FILE, HNSW_METADATA_FILE, 384)
+        self.assertIsInstance(db2.index, faiss.IndexHNSWFlat)
+
+        # Recall through the reloaded graph
+        self._assert_self_recall(db2, *_mass_items())
+        print("✅ Successfully saved and reloaded 1000 items.")
+
+    @unittest.skipIf(MMAP_READ_FLAGS is None, "this FAISS build cannot memory-map indexes")
+    def test_mmap_reload(self):
+        print("\n[TEST] Memory-mapped Reload (1000 items)")
+        self._saved_hnsw()
+        vecs, metas = _mass_items()
+
+        db2 = VectorStore(HNSW_INDEX_FILE, HNSW_METADATA_FILE, 384, mmap=True)
+        # The vectors under the graph are a view of the mapped file, not a loaded copy
+        storage = faiss.downcast_index(db2.index.storage)
+        self.assertFalse(storage.codes.is_owned)
+        self.assertTrue(db2.read_only)
+
+        self._assert_self_recall(db2, vecs, metas)
+        with self.assertRaises(RuntimeError):
+            db2.add_items(vecs[:1], [{"filename": "extra.png", "text": "extra"}])
+        print("✅ Index reloaded memory-mapped and read-only.")
+
+    def test_quantized_indexing(self):
+        print("\n[TEST] 8-bit Quantized Index (1000 items)")
+        # "sq8" starts flat and is trained + rebuilt as IndexScalarQuantizer at 1000 vectors
+        db = self.db
+        db.reset(index_type="sq8")
+
+        # The sorting test's match/garbage pair plus random filler, so the
+        # quantizer is trained on (and must still rank) the same vectors
+        vecs, metas = _mass_items()
+        vecs[0] = 1
+        vecs[1] = 0
+        metas[0]["filename"] = "match.png"
+        metas[1]["filename"] = "garbage.png"
+        db.add_items(vecs, metas)
+        db.save_index()
+
         # Reload
-        db2 = VectorStore(TEST_INDEX_FILE, TEST_METADATA_FILE, 384)
-        self.assertEqual(db2.index.ntotal, 1000) # Should be exactly 1000
-        print("✅ Successfully indexed and reloaded 1000 items.")
+        db2 = VectorStore(TEST_INDEX_FILE, TEST_METADATA_FILE, 384, index_type="sq8")
+        self.assertEqual(db2.index.ntotal, 1000)
+        self.assertIsInstance(db2.index, faiss.IndexScalarQuantizer)
+
+        # Recall sanity check: 8-bit codes must not change the top hit
+        # Zero-allocation all-ones view; search() makes the contiguous copy FAISS needs
+        query = np.broadcast_to(np.float32(1.0), (384,))
+        results = db2.search(query, top_k=2)
+        self.assertEqual(results[0]['filename'], "match.png")
+        print(f"✅ Quantized index reloaded, top match score: {results[0]['score']}")
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.core import embedder as embedder_module
+from src.core.embedder import TextEmbedder, _text_key
+
+class StubModel:
+    """Stands in for SentenceTransformer: deterministic vectors, and records what it encodes."""
+    def __init__(self, model_name, device=None):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls.append(list(texts))
+        vectors = np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+def _text_with_nul_suffix() -> str:
+    """A text whose digest ends in b"\\x00" (NumPy "S" arrays would strip that byte)."""
+    i = 0
+    while not _text_key(f"chunk {i}").endswith(b"\x00"):
+        i += 1
+    return f"chunk {i}"
+
+class EmbeddingCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "embedding_cache.npz")
+        patcher = mock.patch.object(embedder_module, "SentenceTransformer", StubModel)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_duplicates_encoded_once(self):
+        print("\n[TEST] Embedding Dedup")
+        embedder = TextEmbedder("stub-model", warmup=False)
+        vectors = embedder.embed_texts(["header", "body", "header"])
+        self.assertEqual(embedder.model.calls, [["header", "body"]])
+        np.testing.assert_array_equal(vectors[0], vectors[2])
+        print("✅ Repeated text went through the model once.")
+
+    def test_empty_input_keeps_dimension(self):
+        print("\n[TEST] Embedding Empty Input")
+        embedder = TextEmbedder("stub-model", warmup=False)
+        self.assertEqual(embedder.embed_texts([]).shape, (0, 3))
+        print("✅ No texts gave a (0, dim) array.")
+
+    def test_cache_round_trip(self):
+        print("\n[TEST] Embedding Cache Round-Trip")
+        texts = [_text_with_nul_suffix(), "body"]
+        embedder = TextEmbedder("stub-model", warmup=False)
+        expected = embedder.embed_texts(texts)
+        embedder.save_cache(self.cache_path)
+
+        reloaded = TextEmbedder("stub-model", warmup=False)
+        reloaded.load_cache(self.cache_path)
+        self.assertEqual(set(reloaded._cache), set(embedder._cache))
+        np.testing.assert_array_equal(reloaded.embed_texts(texts), expected)
+        self.assertEqual(reloaded.model.calls, []) # all hits, including the NUL-suffixed key
+        print("✅ Cache saved and reloaded without re-encoding.")
+
+    def test_save_prunes_unused_entries(self):
+        print("\n[TEST] Embedding Cache Pruning")
+        embedder = TextEmbedder("stub-model", warmup=False)
+        embedder.embed_texts(["kept", "deleted image chunk"])
+        embedder.save_cache(self.cache_path)
+
+        # Next run: the second image is gone, so its chunk is never asked for
+        next_run = TextEmbedder("stub-model", warmup=False)
+        next_run.load_cache(self.cache_path)
+        next_run.embed_texts(["kept", "new"])
+        next_run.save_cache(self.cache_path)
+
+        reloaded = TextEmbedder("stub-model", warmup=False)
+        reloaded.load_cache(self.cache_path)
+        self.assertEqual(set(reloaded._cache), {_text_key("kept"), _text_key("new")})
+        print("✅ Entries not used this run were dropped on save.")
+
+    def test_cache_from_other_model_is_ignored(self):
+        print("\n[TEST] Embedding Cache Tag Mismatch")
+        embedder = TextEmbedder("stub-model", warmup=False)
+        embedder.embed_texts(["body"])
+        embedder.save_cache(self.cache_path)
+
+        other = TextEmbedder("other-model", warmup=False)
+        other.load_cache(self.cache_path)
+        self.assertEqual(other._cache, {})
+        other.embed_texts(["body"])
+        self.assertEqual(other.model.calls, [["body"]])
+        print("✅ Vectors from another model were not reused.")
+
+if __name__ == "__main__":
+    unittest.main()
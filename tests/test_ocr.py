@@ -0,0 +1,44 @@
+import unittest
+from src.core.ocr import OCRProcessor
+
+# (word, confidence) -> kept as
+FILTER_CASES = [
+    ("Hello", 96, "Hello"),
+    ("World", "96.5", "World"),    # pytesseract may report confidences as strings
+    (" padded ", 91, "padded"),    # surrounding whitespace is stripped
+    ("word", -1, None),            # -1 = not a word box
+    ("low", 29.9, None),           # Rule A: below 30
+    ("edge", 30, "edge"),
+    ("junk", "n/a", None),         # unparsable confidence counts as 0
+    ("", 95, None),                # Rule B: empty
+    ("   ", 95, None),
+    ("--", 95, None),              # Rule C: multi-char words need a letter or digit
+    ("!!!", 95, None),
+    ("e.g.", 95, "e.g."),
+    ("a", 95, "a"),                # Rule D: only 'a' / 'I' survive as single letters
+    ("I", 95, "I"),
+    ("x", 95, None),
+    ("!", 95, None),
+]
+
+class FilterWordsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ocr = OCRProcessor()
+
+    def test_filter_cases(self):
+        print("\n[TEST] OCR Word Filter")
+        for word, conf, expected in FILTER_CASES:
+            with self.subTest(word=word, conf=conf):
+                self.assertEqual(self.ocr._filter_words([word], [conf]), [expected] if expected else [])
+        print("✅ Each rule keeps/drops the right words.")
+
+    def test_filter_keeps_reading_order(self):
+        print("\n[TEST] OCR Word Filter (whole page)")
+        words, confs, expected = zip(*FILTER_CASES)
+        self.assertEqual(self.ocr._filter_words(list(words), list(confs)), [e for e in expected if e])
+        print("✅ Surviving words stay in reading order.")
+
+if __name__ == "__main__":
+    unittest.main()
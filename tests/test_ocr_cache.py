@@ -0,0 +1,54 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from src.core.ocr_cache import OCRCache, file_digest
+
+class OCRCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "ocr_cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_digest(self):
+        print("\n[TEST] File Digest")
+        path = os.path.join(self.tmp.name, "image.png")
+        payload = b"\x89PNG" + bytes(range(256)) * 10
+        with open(path, "wb") as f:
+            f.write(payload)
+        # Small blocks force several reads; the digest must not depend on them
+        self.assertEqual(file_digest(path, block_size=7), hashlib.sha256(payload).hexdigest())
+        print("✅ Digest matches sha256 of the contents.")
+
+    def test_save_and_load(self):
+        print("\n[TEST] OCR Cache Round-Trip")
+        cache = OCRCache(self.cache_path)
+        self.assertIsNone(cache.get("abc"))
+        cache.put("abc", "Hello World")
+        cache.put("def", "") # an image with no valid words is still a result
+        cache.put("ghi", "Café “quoted” 東京")
+        cache.save()
+
+        reloaded = OCRCache(self.cache_path)
+        self.assertEqual(reloaded.entries, cache.entries)
+        self.assertEqual(reloaded.get("def"), "")
+        print("✅ Cache saved and reloaded.")
+
+    def test_corrupt_file_is_ignored(self):
+        print("\n[TEST] Corrupt OCR Cache")
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            f.write('{"abc": "trunc')
+        cache = OCRCache(self.cache_path)
+        self.assertEqual(cache.entries, {})
+
+        # ...and the next save replaces it with a valid file
+        cache.put("abc", "Hello")
+        cache.save()
+        self.assertEqual(OCRCache(self.cache_path).get("abc"), "Hello")
+        print("✅ Corrupt cache ignored and rewritten.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,19 @@
 from src.core.ocr import OCRProcessor
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from src import config
 
+# One OCRProcessor per thread (its Tesseract engine is per-thread anyway),
+# built on first use and reused by every later call from that thread
+_local = threading.local()
+
+def _get():
+    if not hasattr(_local, "ocr"):
+        _local.ocr = OCRProcessor()
+    return _local.ocr
+
 def test_ocr(image_name):
-    ocr = OCRProcessor()
     image_path = os.path.join(config.RAW_IMAGES_DIR, image_name)
     
     if not os.path.exists(image_path):
@@ -11,11 +21,23 @@ def test_ocr(image_name):
         return
 
     print(f"--- Processing {image_name} ---")
-    text = ocr.extract_text(image_path)
+    text = _get().extract_text(image_path)
     print("\n--- Extracted Text ---")
     print(text)
     print("\n----------------------")
 
+def test_ocr_batch(image_names):
+    """
+    Runs OCR on several images from data/raw in parallel threads.
+    Returns the texts in the same order as `image_names` ("" for failures).
+    """
+    def run(image_name):
+        return _get().extract_text(os.path.join(config.RAW_IMAGES_DIR, image_name))
+
+    # OpenCV and tesserocr release the GIL while they work, so threads scale with cores
+    with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, max(len(image_names), 1))) as executor:
+        return list(executor.map(run, image_names))
+
 if __name__ == "__main__":
     # You can change this to any image file in data/raw
     test_ocr("test_image.png")